@@ -8,6 +8,22 @@ import configparser
 from urllib.parse import urlparse
 from PIL import Image, UnidentifiedImageError
 import io
+import zipfile
+import cProfile
+import functools
+import hmac
+import random
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Profiling defaults (opt-in, see [Profiling] in env.ini.example)
+profiling_enabled = False
+profiling_sample_rate = 0.0
+profiling_dir = "profiles"
+profiling_max_dumps = 50
+profiling_admin_token = ""
 
 if not Path("env.ini").exists():
     debug = False
@@ -19,6 +35,12 @@ else:
     debug = config.getboolean("Boot", "DEBUG")
     host = config.get("Boot", "IP_BINDING")
     port = config.getint("Boot", "PORT")
+    if config.has_section("Profiling"):
+        profiling_enabled = config.getboolean("Profiling", "ENABLED", fallback=profiling_enabled)
+        profiling_sample_rate = config.getfloat("Profiling", "SAMPLE_RATE", fallback=profiling_sample_rate)
+        profiling_dir = config.get("Profiling", "DIRECTORY", fallback=profiling_dir)
+        profiling_max_dumps = config.getint("Profiling", "MAX_DUMPS", fallback=profiling_max_dumps)
+        profiling_admin_token = config.get("Profiling", "ADMIN_TOKEN", fallback=profiling_admin_token)
 
 # Application version (displayed in the UI)
 VERSION = "v1.7.1"
@@ -31,7 +53,31 @@ SHOUTOUT = "Shoutout to Brio plugin! This wouldn't exist without it."
 
 thumbnail_sizes = {"480", "720", "1080", "none"}
 
+# Default byte budget for images recompressed by /optimize (decoded image bytes, not base64)
+OPTIMIZE_MAX_BYTES = 512 * 1024
+# Formats/qualities tried by /optimize, in order. PNG is always tried as the lossless option.
+OPTIMIZE_QUALITIES = (90, 80, 70, 60, 50)
+
+# Request limits so a single adversarial input can't tie up the server (CPU/memory) for everyone else
+MAX_UPLOAD_BYTES = 64 * 1024 * 1024  # whole request body, all files included
+MAX_FORM_FIELD_BYTES = 500_000  # non-file form fields such as "changes" (Flask's own default, made explicit)
+# Base64Image sent inline in "changes"; real images should be uploaded as image_file instead
+MAX_INLINE_IMAGE_BYTES = 256 * 1024
+MAX_JSON_DEPTH = 64  # real .pose/.chara files nest < 10 levels deep
+MAX_JSON_CONTAINERS = 100_000  # arrays + objects in one file; a full .chara has a few thousand
+MAX_CHANGES_ITEMS = 256  # commas/brackets allowed in the "changes" payload before it is even parsed
+MAX_IMAGE_PIXELS = 40_000_000  # ~8K x 5K, well above any screenshot
+MAX_IMAGE_ASPECT_RATIO = 32
+MAX_DOWNLOAD_BYTES = 20 * 1024 * 1024
+DOWNLOAD_TIMEOUT = 15  # seconds, for the whole download
+
 app = Flask(__name__)
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
+app.config["MAX_FORM_MEMORY_SIZE"] = MAX_FORM_FIELD_BYTES
+
+# Pillow warns above this many pixels and only raises DecompressionBombError above twice as many;
+# check_image_limits rejects everything over MAX_IMAGE_PIXELS from the header, before any decoding.
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
 
 # Compatibility for Pillow resampling attribute names (Image.Resampling.LANCZOS or Image.LANCZOS)
 # Use hasattr checks to avoid IDE/linter warnings about missing attributes in some Pillow versions.
@@ -46,14 +92,200 @@ else:
     RESAMPLE_LANCZOS = 1
 
 
+# Only one request is profiled at a time. cProfile only sees the thread that enabled it, but tracemalloc is
+# process-wide, so overlapping profiled requests would each record the other's allocations (and stop its tracer).
+_profiling_lock = threading.Lock()
+
+
+def should_profile_request():  # -> (bool, bool):
+    """Decide whether the current request gets profiled. Returns (profile, forced).
+
+    An admin can force it with an X-Profile header matching ADMIN_TOKEN (works even when sampling is off),
+    otherwise a SAMPLE_RATE fraction of requests is picked when profiling is ENABLED.
+    """
+    token = request.headers.get("X-Profile", "")
+    if profiling_admin_token and token and hmac.compare_digest(token.encode("utf-8"), profiling_admin_token.encode("utf-8")):
+        return True, True
+    return profiling_enabled and random.random() < profiling_sample_rate, False
+
+
+def rotate_profile_dumps(dump_dir: Path):
+    """Keep only the newest profiling_max_dumps dumps (a dump is a .prof file plus its .json metadata)."""
+    dumps = sorted(dump_dir.glob("*.prof"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in dumps[max(0, profiling_max_dumps):]:
+        for path in (old, old.with_suffix(".json")):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def profiled(view):
+    """Run a sampled fraction of calls to view under cProfile and tracemalloc and dump the results."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        profile, forced = should_profile_request()
+        # Skip if something else is already tracing: stopping tracemalloc below would stop it too
+        if not profile or tracemalloc.is_tracing() or not _profiling_lock.acquire(blocking=False):
+            return view(*args, **kwargs)
+        try:
+            profiler = cProfile.Profile()
+            tracemalloc.start()
+            started = time.perf_counter()
+            profiler.enable()
+            # A request that blows up is still worth a dump; record it as a 500 with the error
+            status, error = 500, None
+            try:
+                response = view(*args, **kwargs)
+                status = response[1] if isinstance(response, tuple) else getattr(response, "status_code", 200)
+                return response
+            except Exception as e:
+                error = repr(e)
+                raise
+            finally:
+                profiler.disable()
+                elapsed = time.perf_counter() - started
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                # A failed dump must never change the view's outcome
+                try:
+                    write_profile_dump(profiler, snapshot, peak, elapsed, status, error, forced)
+                except OSError as e:
+                    app.logger.error("Failed to write profiling dump to %s: %s", profiling_dir, e)
+        finally:
+            _profiling_lock.release()
+    return wrapper
+
+
+def write_profile_dump(profiler, snapshot, peak, elapsed, status, error, forced):
+    """Write the .prof call graph and .json request metadata for the current request, then rotate old dumps.
+
+    Allocation figures come from tracemalloc, which traces the whole process: allocations made by other
+    (unprofiled) requests running concurrently on other threads are included.
+    """
+    dump_dir = Path(profiling_dir)
+    dump_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    base = dump_dir / f"{stamp}-{request.endpoint}"
+    profiler.dump_stats(str(base.with_suffix(".prof")))
+
+    metadata = {
+        "timestamp": stamp,
+        "endpoint": request.endpoint,
+        "path": request.path,
+        "method": request.method,
+        "status": status,
+        "error": error,
+        "content_length": request.content_length,
+        "files": {name: f.filename for name, f in request.files.items()},
+        "form_fields": sorted(request.form.keys()),
+        "forced": forced,
+        "wall_time_seconds": round(elapsed, 6),
+        # Process-wide: includes concurrent requests on other threads, not just this one
+        "allocation_scope": "process",
+        "peak_traced_bytes": peak,
+        "top_allocations": [
+            {"location": str(stat.traceback[0]), "size": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:25]
+        ],
+    }
+    base.with_suffix(".json").write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+    rotate_profile_dumps(dump_dir)
+
+
 def fetch_file_from_url(url: str):  # -> (bytes, str):
-    r = requests.get(url)
-    r.raise_for_status()
+    # requests' timeout only applies per socket read, so a slow-drip server is caught by the deadline instead
+    deadline = time.monotonic() + DOWNLOAD_TIMEOUT
+    with requests.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as r:
+        r.raise_for_status()
+        chunks = []
+        total = 0
+        while True:
+            # read1 (urllib3 2.2+) returns whatever has arrived; iter_content would block until a whole chunk is in
+            chunk = r.raw.read1(64 * 1024, decode_content=True)
+            if not chunk:
+                break
+            if time.monotonic() > deadline:
+                raise ValueError(f"Download took longer than {DOWNLOAD_TIMEOUT} seconds")
+            total += len(chunk)
+            if total > MAX_DOWNLOAD_BYTES:
+                raise ValueError(f"Download exceeds {MAX_DOWNLOAD_BYTES} bytes")
+            chunks.append(chunk)
 
     parsed = urlparse(url)
     filename = Path(parsed.path).name or "downloaded.pose"
 
-    return r.content, filename
+    return b"".join(chunks), filename
+
+
+class JsonLimitError(ValueError):
+    """Raised by load_json_limited when a document is too complex to process; the message is user-facing."""
+
+
+def load_json_limited(text: str):
+    """json.loads with complexity limits, so a small but pathological document can't eat CPU/memory.
+
+    Raises JsonLimitError when a limit is exceeded and json.JSONDecodeError for invalid JSON.
+    """
+    # str.count runs at C speed and bounds the work before parsing. Counts brackets inside strings too,
+    # which only makes the check stricter.
+    containers = text.count('[') + text.count('{')
+    if containers > MAX_JSON_CONTAINERS:
+        raise JsonLimitError(f"contains more than {MAX_JSON_CONTAINERS} arrays/objects")
+    obj = json.loads(text)
+    # Depth can't exceed the number of containers, so most documents skip the walk entirely
+    if containers > MAX_JSON_DEPTH and json_depth_exceeds(obj):
+        raise JsonLimitError(f"is nested deeper than {MAX_JSON_DEPTH} levels")
+    return obj
+
+
+def json_depth_exceeds(obj, max_depth: int = MAX_JSON_DEPTH) -> bool:
+    """Return True if obj nests lists/dicts deeper than max_depth (iterative, so deep input can't blow the stack)."""
+    stack = [(obj, 1)]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, dict):
+            children = node.values()
+        elif isinstance(node, list):
+            children = node
+        else:
+            continue
+        if depth > max_depth:
+            return True
+        stack.extend((child, depth + 1) for child in children if isinstance(child, (dict, list)))
+    return False
+
+
+def check_inline_image(b64: str):  # -> str | None:
+    """Validate a Base64Image sent inline in "changes": small, a supported image type and within the image limits."""
+    if len(b64) > MAX_INLINE_IMAGE_BYTES:
+        return f"Error: Inline Base64Image exceeds {MAX_INLINE_IMAGE_BYTES} bytes; upload the image as image_file instead"
+    if b64.startswith("data:") and "," in b64:
+        b64 = b64.split(",", 1)[1]
+    try:
+        with Image.open(io.BytesIO(base64.b64decode(b64, validate=True))) as img:
+            if (img.format or "").lower() not in {"png", "jpeg", "gif", "bmp", "webp"}:
+                return "Error: Base64Image is not a supported image type"
+            return check_image_limits(img)
+    except (ValueError, UnidentifiedImageError):
+        return "Error: Base64Image must be a base64-encoded image"
+    except Image.DecompressionBombError:
+        return f"Error: Image dimensions exceed the maximum of {MAX_IMAGE_PIXELS} pixels"
+
+
+def check_image_limits(img):  # -> str | None:
+    """Reject images whose dimensions would make decoding/resizing disproportionately expensive.
+
+    Only reads the header-derived size, so call it before anything that decodes pixel data.
+    """
+    width, height = img.size
+    if width <= 0 or height <= 0 or width * height > MAX_IMAGE_PIXELS:
+        return f"Error: Image dimensions exceed the maximum of {MAX_IMAGE_PIXELS} pixels"
+    if max(width, height) / min(width, height) > MAX_IMAGE_ASPECT_RATIO:
+        return f"Error: Image aspect ratio exceeds the maximum of {MAX_IMAGE_ASPECT_RATIO}:1"
+    return None
 
 
 def image_to_base64(image_bytes: bytes) -> str:
@@ -86,6 +318,7 @@ def index():
 
 
 @app.route("/process", methods=["POST"])
+@profiled
 def process():
 
     # No debug prints. This endpoint accepts image + pose merging via simple form (legacy simple UI).
@@ -106,7 +339,10 @@ def process():
     if img_file and img_file.filename:
         image_bytes = img_file.read()
     elif img_url:
-        image_bytes, _ = fetch_file_from_url(img_url)
+        try:
+            image_bytes, _ = fetch_file_from_url(img_url)
+        except (requests.RequestException, ValueError):
+            return "Error: Could not download the image from the provided URL", 400
     else:
         return "Error: No image provided (URL or file)", 400
 
@@ -115,6 +351,8 @@ def process():
         img = Image.open(io.BytesIO(image_bytes))
     except UnidentifiedImageError:
         return "Error: Provided image is not a supported image type", 400
+    except Image.DecompressionBombError:
+        return f"Error: Image dimensions exceed the maximum of {MAX_IMAGE_PIXELS} pixels", 400
 
     img_format = (img.format or "").lower()
 
@@ -123,6 +361,11 @@ def process():
         img.close()
         return "Error: Provided image is not a supported image type", 400
 
+    limit_error = check_image_limits(img)
+    if limit_error:
+        img.close()
+        return limit_error, 400
+
     # Only downscale (preserve aspect ratio). Do not stretch.
     # Skip resizing animated GIFs to avoid complex frame handling.
     new_image_bytes = image_bytes
@@ -161,7 +404,10 @@ def process():
         pose_bytes = pose_file.read()
         pose_filename = pose_file.filename
     elif pose_url:
-        pose_bytes, pose_filename = fetch_file_from_url(pose_url)
+        try:
+            pose_bytes, pose_filename = fetch_file_from_url(pose_url)
+        except (requests.RequestException, ValueError):
+            return "Error: Could not download the pose file from the provided URL", 400
     else:
         return "No pose/chara/json file provided (URL or file)", 400
 
@@ -176,9 +422,13 @@ def process():
 
     # Ensure pose file is valid JSON
     try:
-        pose_json = json.loads(pose_bytes.decode("utf-8"))
+        pose_json = load_json_limited(pose_bytes.decode("utf-8"))
+    except JsonLimitError as e:
+        return f"Error: Pose/Chara/Json file {e}", 400
     except Exception:
         return "Pose/Chara/Json file is not valid JSON format", 400
+    if not isinstance(pose_json, dict):
+        return "Pose/Chara/Json file must contain a JSON object", 400
 
     # If an image was uploaded, convert to base64 server-side and insert/update Base64Image
     if img_file and img_file.filename:
@@ -189,8 +439,9 @@ def process():
         pose_json["Base64Image"] = b64_str
 
     # Write updated pose JSON and return as attachment
-    temp = tempfile.NamedTemporaryFile(delete=False, suffix=".pose")
-    temp.write(json.dumps(pose_json, indent=2).encode("utf-8"))
+    # Stream to disk rather than building the whole indented document in memory
+    temp = tempfile.NamedTemporaryFile("w", encoding="utf-8", delete=False, suffix=".pose")
+    json.dump(pose_json, temp, indent=2)
     temp.close()
 
     return send_file(
@@ -225,12 +476,15 @@ def browser_ext():
 
 
 @app.route("/process_advanced", methods=["POST"])
+@profiled
 def process_advanced():
     """Accept original .pose file and a minimal "changes" payload (Option B). Merge changes into JSON and return updated .pose.
 
     Expected form fields:
     - pose_file: uploaded original .pose (required)
     - changes: JSON string with any of the keys: Author, Description, Version, Tags, Base64Image
+      (at most MAX_FORM_FIELD_BYTES and MAX_CHANGES_ITEMS items; an inline Base64Image must be a valid image of at
+      most MAX_INLINE_IMAGE_BYTES, larger images go through image_file)
     - resize: optional resize choice (same values as /process)
     - image_file: optional uploaded image (fallback) — if present, server will convert image to base64 and set Base64Image
     """
@@ -256,21 +510,32 @@ def process_advanced():
             return "Error: The File appears to be an image; expected JSON object file like .pose, .chara or .json", 400
     except UnidentifiedImageError:
         pass
+    except Image.DecompressionBombError:
+        return "Error: The File appears to be an image; expected JSON object file like .pose, .chara or .json", 400
 
     # Parse original JSON
     try:
-        original = json.loads(pose_bytes.decode('utf-8'))
+        original = load_json_limited(pose_bytes.decode('utf-8'))
+    except JsonLimitError as e:
+        return f"Error: The File {e}", 400
     except Exception:
         return "Error: The File is not valid JSON; expected JSON object file like .pose, .chara or .json", 400
+    if not isinstance(original, dict):
+        return "Error: The File must contain a JSON object; expected JSON object file like .pose, .chara or .json", 400
 
     # Parse changes
     changes_raw = request.form.get('changes', '').strip()
     changes = {}
     if changes_raw:
+        # Cheap structural cap before parsing: the allowed keys never need more than a few hundred items
+        if changes_raw.count(',') + changes_raw.count('[') + changes_raw.count('{') > MAX_CHANGES_ITEMS:
+            return "Error: Changes payload has too many items", 400
         try:
             changes = json.loads(changes_raw)
         except Exception:
             return "Error: Changes payload is not valid JSON", 400
+        if not isinstance(changes, dict):
+            return "Error: Changes payload must be a JSON object", 400
 
     allowed_keys = {"Author", "Description", "Version", "Tags", "Base64Image"}
     # Validate and sanitize changes
@@ -308,6 +573,9 @@ def process_advanced():
             if v is None:
                 sanitized[k] = None
             elif isinstance(v, str):
+                inline_error = check_inline_image(v)
+                if inline_error:
+                    return inline_error, 400
                 sanitized[k] = v
             else:
                 return "Error: Base64Image must be a base64 string or null", 400
@@ -326,11 +594,17 @@ def process_advanced():
             img = Image.open(io.BytesIO(img_bytes))
         except UnidentifiedImageError:
             return "Error: Provided image is not a supported image type", 400
+        except Image.DecompressionBombError:
+            return f"Error: Image dimensions exceed the maximum of {MAX_IMAGE_PIXELS} pixels", 400
         img_format = (img.format or '').lower()
         allowed_img_types = {"png", "jpeg", "gif", "bmp", "webp"}
         if img_format not in allowed_img_types:
             img.close()
             return "Error: Provided image is not a supported image type", 400
+        limit_error = check_image_limits(img)
+        if limit_error:
+            img.close()
+            return limit_error, 400
 
         # Server-side resizing: if max_dim is set, resize while preserving aspect ratio
         new_image_bytes = img_bytes
@@ -369,8 +643,9 @@ def process_advanced():
         suffix = ".chara"
     else:
         suffix = ".json"
-    temp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
-    temp.write(json.dumps(original, indent=2).encode('utf-8'))
+    # Stream to disk rather than building the whole indented document in memory
+    temp = tempfile.NamedTemporaryFile("w", encoding="utf-8", delete=False, suffix=suffix)
+    json.dump(original, temp, indent=2)
     temp.close()
 
     return send_file(
@@ -380,6 +655,194 @@ def process_advanced():
         mimetype='application/json'
     )
 
+def optimize_image_bytes(image_bytes: bytes, max_dim, max_bytes: int):  # -> (bytes | None, str | None):
+    """Downscale an image to max_dim and re-encode it at the best quality that fits max_bytes.
+
+    Candidates are tried best quality first: lossless PNG, then WEBP/JPEG (smaller of the two) at each of
+    OPTIMIZE_QUALITIES. The first one that fits max_bytes and is smaller than the original wins; if none fits,
+    the smallest candidate is used. Returns (new_bytes, format) or (None, None) when the image is not
+    recognised, is an animated GIF, already fits both max_dim and max_bytes, or nothing beats the original.
+    """
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        if check_image_limits(img):
+            img.close()
+            return None, None
+        img.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return None, None
+
+    try:
+        if (img.format or '').lower() == 'gif' and getattr(img, 'is_animated', False):
+            return None, None
+
+        width, height = img.size
+        largest = max(width, height)
+        needs_resize = max_dim is not None and largest > max_dim
+        if not needs_resize and len(image_bytes) <= max_bytes:
+            # Already small enough on both counts; re-encoding would only cost quality
+            return None, None
+        if needs_resize:
+            scale = max_dim / float(largest)
+            new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+            resized = img.resize(new_size, RESAMPLE_LANCZOS)
+            img.close()
+            img = resized
+
+        has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+        rgb = img.convert('RGBA' if has_alpha else 'RGB')
+
+        def encode(fmt, **params):
+            buf = io.BytesIO()
+            rgb.save(buf, format=fmt, **params)
+            return buf.getvalue()
+
+        # A candidate only counts if it fits the budget *and* shrinks the image
+        target = min(max_bytes, len(image_bytes) - 1)
+        best = encode('PNG', optimize=True)
+        best_format = 'png'
+        if len(best) > target:
+            for quality in OPTIMIZE_QUALITIES:
+                candidates = [('webp', encode('WEBP', quality=quality, method=4))]
+                if not has_alpha:
+                    # JPEG has no alpha channel; only consider it for opaque images
+                    candidates.append(('jpeg', encode('JPEG', quality=quality, optimize=True)))
+                fmt, data = min(candidates, key=lambda c: len(c[1]))
+                if len(data) < len(best):
+                    best, best_format = data, fmt
+                if len(best) <= target:
+                    break
+    finally:
+        try:
+            img.close()
+        except Exception:
+            pass
+
+    if len(best) >= len(image_bytes):
+        return None, None
+    return best, best_format
+
+
+def optimize_pose_json(pose_json: dict, max_dim, max_bytes: int) -> dict:
+    """Recompress Base64Image in place. Returns a small report of what changed."""
+    report = {"original_bytes": 0, "optimized_bytes": 0, "bytes_saved": 0, "format": None}
+    b64 = pose_json.get("Base64Image")
+    if not isinstance(b64, str) or not b64:
+        return report
+
+    # Tolerate data URLs (data:image/png;base64,...) written by other tools
+    if b64.startswith("data:") and "," in b64:
+        b64 = b64.split(",", 1)[1]
+    try:
+        image_bytes = base64.b64decode(b64, validate=False)
+    except Exception:
+        return report
+
+    report["original_bytes"] = report["optimized_bytes"] = len(image_bytes)
+    new_bytes, new_format = optimize_image_bytes(image_bytes, max_dim, max_bytes)
+    if new_bytes is not None:
+        pose_json["Base64Image"] = image_to_base64(new_bytes)
+        report["optimized_bytes"] = len(new_bytes)
+        report["bytes_saved"] = len(image_bytes) - len(new_bytes)
+        report["format"] = new_format
+    return report
+
+
+@app.route("/optimize", methods=["POST"])
+def optimize():
+    """Shrink the image already embedded in one or more pose files.
+
+    Expected form fields:
+    - pose_file: one or more uploaded .pose/.chara/.json files (required). Several files = batch mode.
+    - resize: target size (same values as /process, default 720)
+    - max_bytes: optional byte budget for the decoded image (default OPTIMIZE_MAX_BYTES)
+
+    A single file is returned as-is; a batch is returned as a .zip with an optimize-report.json.
+    Bytes saved are reported in the X-Bytes-Saved header.
+    """
+    pose_files = [f for f in request.files.getlist('pose_file') if f and f.filename]
+    if not pose_files:
+        return "Error: No .pose, .chara or .json file provided (upload required)", 400
+
+    resize_choice = request.form.get('resize', '720')
+    if resize_choice not in thumbnail_sizes:
+        resize_choice = '720'
+    max_dim = None if resize_choice == 'none' else int(resize_choice)
+
+    try:
+        max_bytes = int(request.form.get('max_bytes', OPTIMIZE_MAX_BYTES))
+    except ValueError:
+        return "Error: max_bytes must be an integer", 400
+    if max_bytes <= 0:
+        return "Error: max_bytes must be greater than 0", 400
+
+    max_pose_bytes = 10 * 1024 * 1024
+    results = []
+    for pose_file in pose_files:
+        pose_bytes = pose_file.read()
+        if len(pose_bytes) > max_pose_bytes:
+            return f"Error: {pose_file.filename} exceeds {max_pose_bytes} bytes (10 MB)", 400
+        extension_error = validate_json_like_extension(pose_file.filename)
+        if extension_error:
+            return extension_error
+        try:
+            pose_json = load_json_limited(pose_bytes.decode('utf-8'))
+        except JsonLimitError as e:
+            return f"Error: {pose_file.filename} {e}", 400
+        except Exception:
+            return f"Error: {pose_file.filename} is not valid JSON; expected JSON object file like .pose, .chara or .json", 400
+        if not isinstance(pose_json, dict):
+            return f"Error: {pose_file.filename} is not a JSON object", 400
+
+        report = optimize_pose_json(pose_json, max_dim, max_bytes)
+        results.append((pose_file.filename, pose_json, report))
+
+    total_saved = sum(r["bytes_saved"] for _, _, r in results)
+
+    if len(results) == 1:
+        filename, pose_json, _ = results[0]
+        # Stream to disk rather than building the whole indented document in memory
+        temp = tempfile.NamedTemporaryFile("w", encoding="utf-8", delete=False, suffix=Path(filename).suffix or ".pose")
+        json.dump(pose_json, temp, indent=2)
+        temp.close()
+        response = send_file(
+            temp.name,
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/json'
+        )
+    else:
+        temp = tempfile.NamedTemporaryFile(delete=False, suffix=".zip")
+        with zipfile.ZipFile(temp, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            # Reserve the report's name so a pose called optimize-report.json can't shadow it
+            used_names = {"optimize-report.json"}
+            for filename, pose_json, report in results:
+                # Avoid silently overwriting duplicate names inside the archive
+                name = Path(filename).name
+                stem, suffix = Path(name).stem, Path(name).suffix
+                n = 1
+                while name in used_names:
+                    name = f"{stem} ({n}){suffix}"
+                    n += 1
+                used_names.add(name)
+                # Report the name used in the archive so entries can be matched back to it
+                report["file"] = name
+                zf.writestr(name, json.dumps(pose_json, indent=2))
+            zf.writestr("optimize-report.json", json.dumps({
+                "total_bytes_saved": total_saved,
+                "files": [r for _, _, r in results],
+            }, indent=2))
+        temp.close()
+        response = send_file(
+            temp.name,
+            as_attachment=True,
+            download_name="optimized-poses.zip",
+            mimetype='application/zip'
+        )
+
+    response.headers['X-Bytes-Saved'] = str(total_saved)
+    return response
+
 def validate_json_like_extension(filename: str):
     json_like_format = (".pose", ".json", ".chara")
     if not filename.lower().endswith(json_like_format):
@@ -0,0 +1,63 @@
+"""
+Summarize the profiling dumps written by main.py (see [Profiling] in env.ini.example).
+
+Usage (from the app directory):
+    python profile_report.py                      # reads ./profiles
+    python profile_report.py --dir profiles --top 30 --sort tottime --endpoint process_advanced
+
+Aggregates every .prof file into one call-graph summary and lists the slowest / most memory hungry requests
+from the matching .json metadata.
+"""
+from __future__ import annotations
+import argparse
+import json
+import pstats
+import sys
+from pathlib import Path
+from typing import List
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize the hottest functions across profiling dumps")
+    parser.add_argument("--dir", type=str, default="profiles", help="Directory holding .prof/.json dumps")
+    parser.add_argument("--top", type=int, default=20, help="Number of functions/requests to show")
+    parser.add_argument("--sort", type=str, default="cumulative", choices=["cumulative", "tottime", "ncalls"],
+                        help="Sort key for the function table")
+    parser.add_argument("--endpoint", type=str, default=None, help="Only include dumps for this endpoint")
+    args = parser.parse_args(argv)
+
+    dump_dir = Path(args.dir)
+    prof_files = sorted(dump_dir.glob("*.prof"))
+    if args.endpoint:
+        prof_files = [p for p in prof_files if p.stem.endswith(f"-{args.endpoint}")]
+
+    if not prof_files:
+        print(f"No profiling dumps found in {dump_dir}")
+        return 0
+
+    metadata = []
+    for prof in prof_files:
+        meta_path = prof.with_suffix(".json")
+        if meta_path.exists():
+            try:
+                metadata.append(json.loads(meta_path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                pass
+
+    print(f"=== {len(prof_files)} dumps from {dump_dir} ===")
+    if metadata:
+        print(f"\n--- Slowest requests (top {args.top}) ---")
+        for meta in sorted(metadata, key=lambda m: m.get("wall_time_seconds", 0), reverse=True)[:args.top]:
+            print(f"{meta.get('wall_time_seconds', 0):9.3f}s  {meta.get('peak_traced_bytes', 0) / 1024 / 1024:8.1f} MB peak  "
+                  f"{meta.get('status')}  {meta.get('endpoint')}  {meta.get('timestamp')}  files={meta.get('files')}")
+
+    stats = pstats.Stats(str(prof_files[0]), stream=sys.stdout)
+    for prof in prof_files[1:]:
+        stats.add(str(prof))
+    print(f"\n--- Hottest functions across all dumps (sorted by {args.sort}) ---")
+    stats.strip_dirs().sort_stats(args.sort).print_stats(args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
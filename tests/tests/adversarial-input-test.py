@@ -0,0 +1,339 @@
+"""
+Adversarial-input performance guard.
+
+Generates a corpus of hostile inputs (deep JSON, huge Tags arrays, extreme aspect ratios, giant palette GIFs,
+decompression bombs, ...) and runs each one through the endpoints via Flask's test client.
+Every request must finish within a CPU-time and peak-memory budget and return the expected status.
+
+Each case runs in a fresh subprocess that only loads its own payload from disk, so the peak RSS growth measured
+around the request covers native (Pillow) allocations and isn't masked by earlier cases or by corpus generation.
+Without a peak-RSS source (Windows) memory falls back to tracemalloc, which only sees Python allocations.
+
+Usage (from repo root):
+    python ./tests/run-tests.py --pattern adversarial
+    python ./tests/tests/adversarial-input-test.py --cpu-budget 2 --mem-budget-mb 256
+"""
+from __future__ import annotations
+import argparse
+import base64
+import functools
+import io
+import json
+import random
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+import zlib
+from pathlib import Path
+from typing import Callable, List, NamedTuple
+
+try:
+    import resource  # POSIX only; used to measure native (Pillow) allocations tracemalloc can't see
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+APP_DIR = Path(__file__).resolve().parents[2] / "app"
+sys.path.insert(0, str(APP_DIR))
+
+from PIL import Image  # noqa: E402
+
+# The corpus trips Pillow's DecompressionBombWarning on purpose
+warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+
+
+class Case(NamedTuple):
+    name: str
+    endpoint: str
+    build: Callable[[], dict]
+    expected: set
+
+
+# ----- corpus helpers -----
+
+def pose_bytes(extra: dict | None = None) -> bytes:
+    pose = {"FileVersion": 4, "Author": "adversarial", "Tags": ["test"], "Bones": {"n_root": {"Position": "0, 0, 0"}}}
+    pose.update(extra or {})
+    return json.dumps(pose).encode("utf-8")
+
+
+def image_bytes(img: Image.Image, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def png_with_fake_size(width: int, height: int) -> bytes:
+    """A tiny PNG whose IHDR claims width x height: a classic decompression bomb header."""
+    data = bytearray(image_bytes(Image.new("L", (1, 1)), "PNG"))
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    data[16:29] = ihdr
+    data[29:33] = struct.pack(">I", zlib.crc32(b"IHDR" + ihdr) & 0xFFFFFFFF)
+    return bytes(data)
+
+
+def noisy_image(mode: str, size) -> Image.Image:
+    """Photo-like content (noise) so lossless PNG is big."""
+    noise = random.Random(size[0] * size[1]).randbytes(size[0] * size[1])
+    return Image.frombytes("L", size, noise).convert(mode)
+
+
+# Images are generated lazily and cached, so a child process that only needs a case's endpoint pays nothing
+@functools.lru_cache(maxsize=None)
+def corpus_image(name: str) -> bytes:
+    if name == "tall":
+        return image_bytes(Image.new("RGB", (1, 50_000)), "PNG")
+    if name == "wide":
+        return image_bytes(Image.new("RGB", (50_000, 1)), "PNG")
+    if name == "bomb":
+        return png_with_fake_size(60_000, 60_000)
+    if name == "giant_gif":
+        return image_bytes(Image.new("P", (7_000, 7_000)), "GIF")
+    if name == "normal":
+        return image_bytes(Image.new("RGB", (1920, 1080), (40, 80, 120)), "PNG")
+    if name == "large":
+        # Just under MAX_IMAGE_PIXELS: allowed, but decodes to ~150 MB of pixels
+        return image_bytes(Image.linear_gradient("L").resize((7_000, 5_500)).convert("RGB"), "PNG")
+    if name == "tiny":
+        return image_bytes(Image.new("RGB", (64, 64), (200, 40, 40)), "PNG")
+    if name == "big_rgb":
+        return image_bytes(noisy_image("RGB", (1400, 1000)), "PNG")
+    raise KeyError(name)
+
+
+def embedded(name: str) -> bytes:
+    return pose_bytes({"Base64Image": base64.b64encode(corpus_image(name)).decode()})
+
+
+def upload(data: bytes, name: str):
+    return io.BytesIO(data), name
+
+
+def build_corpus() -> List[Case]:
+    deep_nesting = "[" * 200_000 + "]" * 200_000
+    # Just under the json module's recursion limit, repeated: parses fine but explodes when re-indented
+    wide_deep = "[" + ",".join(["[" * 500 + "]" * 500] * 4000) + "]"
+
+    return [
+        Case("control: normal advanced request", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "changes": json.dumps({"Author": "me", "Tags": ["a", "b"]}),
+            "image_file": upload(corpus_image("normal"), "ok.png"),
+        }, {200}),
+        Case("control: normal simple request", "/process", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "image_file": upload(corpus_image("normal"), "ok.png"),
+        }, {200}),
+        Case("large image within limits (simple)", "/process", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "image_file": upload(corpus_image("large"), "large.png"),
+        }, {200}),
+        Case("large image within limits", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "image_file": upload(corpus_image("large"), "large.png"),
+        }, {200}),
+        Case("deeply nested pose file", "/process_advanced", lambda: {
+            "pose_file": upload(deep_nesting.encode(), "deep.pose"),
+        }, {400}),
+        Case("deeply nested pose file (simple)", "/process", lambda: {
+            "pose_file": upload(deep_nesting.encode(), "deep.pose"),
+            "image_file": upload(corpus_image("normal"), "ok.png"),
+        }, {400}),
+        Case("100-deep pose file", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes({"Junk": json.loads("[" * 100 + "]" * 100)}), "deep100.pose"),
+        }, {400}),
+        Case("repeated 500-deep arrays in pose", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes().replace(b'"Bones"', b'"Junk": ' + wide_deep.encode() + b', "Bones"'), "wide.pose"),
+        }, {400}),
+        Case("deeply nested changes", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "changes": deep_nesting[:400_000],
+        }, {400}),
+        Case("10 MB single-line Tags changes", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "changes": json.dumps({"Tags": ["x"] * 2_000_000}),
+        }, {400, 413}),
+        Case("400 KB Tags changes", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "changes": json.dumps({"Tags": ["x"] * 80_000}),
+        }, {400}),
+        Case("changes is not an object", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "changes": "[1, 2, 3]",
+        }, {400}),
+        Case("multi-MB Base64Image in changes", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "changes": json.dumps({"Base64Image": base64.b64encode(corpus_image("big_rgb")).decode()}),
+        }, {400, 413}),
+        Case("decompression bomb inline in changes", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "changes": json.dumps({"Base64Image": base64.b64encode(corpus_image("bomb")).decode()}),
+        }, {400}),
+        Case("non-image Base64Image in changes", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "changes": json.dumps({"Base64Image": base64.b64encode(b"not an image").decode()}),
+        }, {400}),
+        Case("small inline Base64Image in changes", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "changes": json.dumps({"Base64Image": base64.b64encode(corpus_image("tiny")).decode()}),
+        }, {200}),
+        Case("10 MB single-line Tags in pose", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes({"Tags": ["tag"] * 1_400_000}), "tags.pose"),
+        }, {200}),
+        Case("1x50000 image", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "image_file": upload(corpus_image("tall"), "tall.png"),
+        }, {400}),
+        Case("50000x1 image (simple)", "/process", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "image_file": upload(corpus_image("wide"), "wide.png"),
+        }, {400}),
+        Case("giant palette GIF", "/process_advanced", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "image_file": upload(corpus_image("giant_gif"), "giant.gif"),
+        }, {400}),
+        Case("PNG decompression bomb", "/process", lambda: {
+            "pose_file": upload(pose_bytes(), "ok.pose"),
+            "image_file": upload(corpus_image("bomb"), "bomb.png"),
+        }, {400}),
+        Case("PNG decompression bomb as pose file", "/process_advanced", lambda: {
+            "pose_file": upload(corpus_image("bomb"), "bomb.pose"),
+        }, {400}),
+        Case("decompression bomb embedded in pose", "/optimize", lambda: {
+            "pose_file": upload(embedded("bomb"), "bomb.pose"),
+        }, {200}),
+        Case("oversized request body", "/process_advanced", lambda: {
+            "pose_file": upload(b" " * (65 * 1024 * 1024), "huge.pose"),
+        }, {413}),
+    ]
+
+
+# ----- harness -----
+
+def peak_rss_mb() -> float:
+    # On Linux ru_maxrss is inherited across fork/exec (the child would start at the parent's peak),
+    # VmHWM belongs to the new address space so it starts from this process's own usage
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def write_payload(case: Case, case_dir: Path):
+    """Save a case's form fields to case_dir: files as-is, plain fields in fields.json."""
+    case_dir.mkdir(parents=True)
+    fields = {}
+    for key, value in case.build().items():
+        values = value if isinstance(value, list) else [value]
+        entries = []
+        for i, v in enumerate(values):
+            if isinstance(v, tuple):
+                stream, filename = v
+                blob = f"{key}-{i}"
+                (case_dir / blob).write_bytes(stream.getvalue())
+                entries.append({"blob": blob, "filename": filename})
+            else:
+                entries.append({"value": v})
+        fields[key] = entries
+    (case_dir / "fields.json").write_text(json.dumps(fields), encoding="utf-8")
+
+
+def read_payload(case_dir: Path) -> dict:
+    data = {}
+    fields = json.loads((case_dir / "fields.json").read_text(encoding="utf-8"))
+    for key, entries in fields.items():
+        values = [
+            (io.BytesIO((case_dir / e["blob"]).read_bytes()), e["filename"]) if "blob" in e else e["value"]
+            for e in entries
+        ]
+        data[key] = values if len(values) > 1 else values[0]
+    return data
+
+
+def run_child(index: int, case_dir: Path) -> int:
+    """Run one case in this (fresh) process and print {"status", "cpu", "peak"} as JSON."""
+    from main import app
+
+    case = build_corpus()[index]
+    client = app.test_client()
+    data = read_payload(case_dir)
+
+    if peak_rss_mb():
+        # High-water mark read before the only request, so its growth is what the request itself allocated
+        rss_before = peak_rss_mb()
+        cpu_start = time.process_time()
+        resp = client.post(case.endpoint, data=data, content_type="multipart/form-data")
+        cpu = time.process_time() - cpu_start
+        peak = peak_rss_mb() - rss_before
+    else:
+        # No peak RSS available (Windows): fall back to tracemalloc, which only sees Python allocations
+        tracemalloc.start()
+        cpu_start = time.process_time()
+        resp = client.post(case.endpoint, data=data, content_type="multipart/form-data")
+        cpu = time.process_time() - cpu_start
+        peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    resp.close()
+    print(json.dumps({"status": resp.status_code, "cpu": cpu, "peak": peak}))
+    return 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run adversarial inputs against the endpoints under CPU/memory budgets")
+    parser.add_argument("--cpu-budget", type=float, default=2.0, help="Max CPU seconds per request")
+    parser.add_argument("--mem-budget-mb", type=float, default=256.0, help="Max peak memory (MB) per request")
+    parser.add_argument("--case", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--case-dir", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case is not None:
+        return run_child(args.case, Path(args.case_dir))
+
+    corpus = build_corpus()
+    failed = 0
+    with tempfile.TemporaryDirectory(prefix="adversarial-corpus-") as tmp:
+        for index, case in enumerate(corpus):
+            case_dir = Path(tmp) / str(index)
+            write_payload(case, case_dir)
+            completed = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), "--case", str(index), "--case-dir", str(case_dir)],
+                capture_output=True, text=True,
+            )
+            problems = []
+            try:
+                result = json.loads(completed.stdout.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                failed += 1
+                print(f"FAIL  {case.name:40} {case.endpoint:18} crashed (exit code {completed.returncode})")
+                print(completed.stderr)
+                continue
+
+            status, cpu, peak = result["status"], result["cpu"], result["peak"]
+            if status not in case.expected:
+                problems.append(f"status {status} not in {sorted(case.expected)}")
+            if cpu > args.cpu_budget:
+                problems.append(f"cpu {cpu:.2f}s > {args.cpu_budget}s")
+            if peak > args.mem_budget_mb:
+                problems.append(f"memory {peak:.0f} MB > {args.mem_budget_mb:.0f} MB")
+            label = "FAIL" if problems else "ok"
+            print(f"{label:4}  {case.name:40} {case.endpoint:18} {status}  cpu={cpu:.3f}s  peak={peak:.1f} MB"
+                  + (f"  <- {'; '.join(problems)}" if problems else ""))
+            failed += bool(problems)
+
+    print(f"\nFailures: {failed}")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,158 @@
+"""
+Functional tests for the /optimize endpoint, run in-process via Flask's test client.
+
+Usage (from repo root):
+    python ./tests/run-tests.py --pattern optimize
+"""
+from __future__ import annotations
+import base64
+import io
+import json
+import random
+import sys
+import zipfile
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[2] / "app"
+sys.path.insert(0, str(APP_DIR))
+
+from PIL import Image  # noqa: E402
+from main import app, OPTIMIZE_MAX_BYTES  # noqa: E402
+
+
+def pose_bytes(extra: dict | None = None) -> bytes:
+    pose = {"FileVersion": 4, "Author": "optimize", "Tags": ["test"], "Bones": {"n_root": {"Position": "0, 0, 0"}}}
+    pose.update(extra or {})
+    return json.dumps(pose).encode("utf-8")
+
+
+def image_bytes(img: Image.Image, fmt: str, **params) -> bytes:
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **params)
+    return buf.getvalue()
+
+
+def noisy_image(mode: str, size) -> Image.Image:
+    """Photo-like content (noise) so lossless PNG is big and lossy formats have something to win."""
+    noise = random.Random(size[0] * size[1]).randbytes(size[0] * size[1])
+    return Image.frombytes("L", size, noise).convert(mode)
+
+
+def colour_noise(size) -> Image.Image:
+    """Seeded RGB noise; unlike noisy_image it doesn't compress well as PNG."""
+    return Image.frombytes("RGB", size, random.Random(size[0] * size[1]).randbytes(size[0] * size[1] * 3))
+
+
+def embedded(data: bytes) -> bytes:
+    return pose_bytes({"Base64Image": base64.b64encode(data).decode()})
+
+
+def embedded_image(resp) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(json.loads(resp.data)["Base64Image"])))
+
+
+def post(data: dict):
+    return app.test_client().post("/optimize", data=data, content_type="multipart/form-data")
+
+
+# ----- tests -----
+
+def test_pose_without_image():
+    resp = post({"pose_file": (io.BytesIO(pose_bytes()), "ok.pose")})
+    assert resp.status_code == 200, resp.data
+    assert resp.headers["X-Bytes-Saved"] == "0"
+    assert "Base64Image" not in json.loads(resp.data)
+
+
+def test_oversized_png_is_downscaled_and_lossy():
+    original = image_bytes(noisy_image("RGB", (1400, 1000)), "PNG")
+    resp = post({"pose_file": (io.BytesIO(embedded(original)), "big.pose"), "resize": "720"})
+    assert resp.status_code == 200, resp.data
+    img = embedded_image(resp)
+    assert 700 <= max(img.size) <= 720, img.size
+    assert img.format in ("JPEG", "WEBP"), img.format
+    assert int(resp.headers["X-Bytes-Saved"]) > 0
+
+
+def test_large_dimensions_small_jpeg_is_downscaled():
+    # 4K JPEG that is already small in bytes: the 720px PNG fits the budget but is *bigger* than the original,
+    # so the optimizer has to move on to the lossy candidates instead of giving up
+    original = image_bytes(colour_noise((64, 36)).resize((3840, 2160), Image.BICUBIC), "JPEG", quality=30)
+    png_720 = image_bytes(Image.open(io.BytesIO(original)).resize((720, 405), Image.LANCZOS), "PNG", optimize=True)
+    assert len(original) < len(png_720) <= OPTIMIZE_MAX_BYTES, "fixture no longer reproduces the PNG-fits-but-is-bigger case"
+    resp = post({"pose_file": (io.BytesIO(embedded(original)), "4k.pose"), "resize": "720"})
+    assert resp.status_code == 200, resp.data
+    img = embedded_image(resp)
+    assert max(img.size) <= 720, img.size
+    saved = int(resp.headers["X-Bytes-Saved"])
+    assert saved > 0, saved
+    assert len(original) - saved <= OPTIMIZE_MAX_BYTES
+
+
+def test_rgba_keeps_alpha():
+    img = noisy_image("RGB", (1400, 1000))
+    img.putalpha(Image.linear_gradient("L").resize(img.size))
+    resp = post({
+        "pose_file": (io.BytesIO(embedded(image_bytes(img, "PNG"))), "alpha.pose"),
+        "resize": "720",
+        "max_bytes": "65536",
+    })
+    assert resp.status_code == 200, resp.data
+    out = embedded_image(resp)
+    assert out.format != "JPEG" and "A" in out.getbands(), (out.format, out.mode)
+
+
+def test_already_small_image_is_kept():
+    original = image_bytes(noisy_image("RGB", (320, 200)), "JPEG")
+    resp = post({"pose_file": (io.BytesIO(embedded(original)), "small.pose")})
+    assert resp.status_code == 200, resp.data
+    assert json.loads(resp.data)["Base64Image"] == base64.b64encode(original).decode()
+    assert resp.headers["X-Bytes-Saved"] == "0"
+
+
+def test_batch_report_matches_archive_names():
+    big = embedded(image_bytes(noisy_image("RGB", (1400, 1000)), "PNG"))
+    resp = post({"pose_file": [
+        (io.BytesIO(big), "a.pose"),
+        (io.BytesIO(big), "a.pose"),
+        (io.BytesIO(pose_bytes()), "b.chara"),
+        (io.BytesIO(pose_bytes()), "optimize-report.json"),
+    ]})
+    assert resp.status_code == 200, resp.data
+    zf = zipfile.ZipFile(io.BytesIO(resp.data))
+    names = zf.namelist()
+    assert names.count("optimize-report.json") == 1, names
+    report = json.loads(zf.read("optimize-report.json"))
+    entries = sorted(n for n in names if n != "optimize-report.json")
+    assert entries == ["a (1).pose", "a.pose", "b.chara", "optimize-report (1).json"], entries
+    assert sorted(f["file"] for f in report["files"]) == entries
+    assert report["total_bytes_saved"] == int(resp.headers["X-Bytes-Saved"]) > 0
+
+
+def test_invalid_max_bytes():
+    for value in ("lots", "0", "-5"):
+        resp = post({"pose_file": (io.BytesIO(pose_bytes()), "ok.pose"), "max_bytes": value})
+        assert resp.status_code == 400, (value, resp.status_code)
+
+
+def test_invalid_extension():
+    resp = post({"pose_file": (io.BytesIO(pose_bytes()), "ok.txt")})
+    assert resp.status_code == 400, resp.status_code
+
+
+def main() -> int:
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith("test_") and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"ok    {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL  {name}: {e}")
+    print(f"\nFailures: {failed}")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,158 @@
+"""
+Tests for the opt-in request profiling ([Profiling] in env.ini) and profile_report.py, run in-process via
+Flask's test client. Profiling settings are module globals in main, so each test sets the ones it needs.
+
+Usage (from repo root):
+    python ./tests/run-tests.py --pattern profiling
+"""
+from __future__ import annotations
+import contextlib
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parents[2] / "app"
+sys.path.insert(0, str(APP_DIR))
+
+import main  # noqa: E402
+import profile_report  # noqa: E402
+
+TOKEN = "s3cret"
+
+
+# A profiled view that always fails, registered before the app handles its first request
+@main.app.route("/_profiling_test_boom", methods=["POST"])
+@main.profiled
+def _profiling_test_boom():
+    raise RuntimeError("boom")
+
+
+def configure(dump_dir, enabled=False, rate=0.0, max_dumps=50, token=TOKEN):
+    main.profiling_enabled = enabled
+    main.profiling_sample_rate = rate
+    main.profiling_dir = str(dump_dir)
+    main.profiling_max_dumps = max_dumps
+    main.profiling_admin_token = token
+
+
+def post_advanced(headers=None):
+    return main.app.test_client().post(
+        "/process_advanced",
+        data={"pose_file": (io.BytesIO(b'{"Author": "x"}'), "a.pose"), "changes": '{"Author": "profiled"}'},
+        headers=headers or {},
+        content_type="multipart/form-data",
+    )
+
+
+def dumps_in(dump_dir: Path):
+    return sorted(p.name for p in dump_dir.glob("*")) if dump_dir.exists() else []
+
+
+# ----- tests -----
+
+def test_forced_header_writes_dump_pair():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_dir = Path(tmp) / "profiles"
+        configure(dump_dir)
+        resp = post_advanced({"X-Profile": TOKEN})
+        assert resp.status_code == 200, resp.data
+        profs = list(dump_dir.glob("*-process_advanced.prof"))
+        assert len(profs) == 1, dumps_in(dump_dir)
+        meta = json.loads(profs[0].with_suffix(".json").read_text(encoding="utf-8"))
+        assert meta["forced"] is True and meta["status"] == 200 and meta["error"] is None, meta
+        assert meta["endpoint"] == "process_advanced" and meta["files"] == {"pose_file": "a.pose"}, meta
+        assert meta["allocation_scope"] == "process"
+
+
+def test_wrong_token_or_disabled_writes_nothing():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_dir = Path(tmp) / "profiles"
+        configure(dump_dir, enabled=False, rate=0.0)
+        for headers in ({"X-Profile": "wrong"}, {"X-Profile": ""}, {}):
+            assert post_advanced(headers).status_code == 200
+        # Enabled but a 0 sample rate picks nothing either
+        configure(dump_dir, enabled=True, rate=0.0)
+        assert post_advanced().status_code == 200
+        # No admin token configured: the header must not force anything
+        configure(dump_dir, token="")
+        assert post_advanced({"X-Profile": ""}).status_code == 200
+        assert dumps_in(dump_dir) == [], dumps_in(dump_dir)
+
+
+def test_sampling_enabled_writes_dump():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_dir = Path(tmp) / "profiles"
+        configure(dump_dir, enabled=True, rate=1.0)
+        assert post_advanced().status_code == 200
+        meta = json.loads(next(dump_dir.glob("*.json")).read_text(encoding="utf-8"))
+        assert meta["forced"] is False, meta
+
+
+def test_rotation_keeps_max_dumps():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_dir = Path(tmp) / "profiles"
+        configure(dump_dir, max_dumps=2)
+        for _ in range(4):
+            assert post_advanced({"X-Profile": TOKEN}).status_code == 200
+        assert len(list(dump_dir.glob("*.prof"))) == 2, dumps_in(dump_dir)
+        assert len(list(dump_dir.glob("*.json"))) == 2, dumps_in(dump_dir)
+
+
+def test_dump_oserror_keeps_response():
+    with tempfile.TemporaryDirectory() as tmp:
+        # A regular file where the dump directory should be: mkdir raises
+        blocker = Path(tmp) / "not-a-dir"
+        blocker.write_text("x")
+        configure(blocker)
+        resp = post_advanced({"X-Profile": TOKEN})
+        assert resp.status_code == 200, resp.status_code
+        assert resp.headers.get("Content-Disposition", "").startswith("attachment"), resp.headers
+
+
+def test_failing_view_is_dumped_as_500():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_dir = Path(tmp) / "profiles"
+        configure(dump_dir)
+        resp = main.app.test_client().post("/_profiling_test_boom", headers={"X-Profile": TOKEN})
+        assert resp.status_code == 500, resp.status_code
+        meta = json.loads(next(dump_dir.glob("*.json")).read_text(encoding="utf-8"))
+        assert meta["status"] == 500 and "boom" in meta["error"], meta
+
+
+def test_report_summarizes_dumps():
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_dir = Path(tmp) / "profiles"
+        configure(dump_dir)
+        for _ in range(3):
+            post_advanced({"X-Profile": TOKEN})
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            rc = profile_report.main(["--dir", str(dump_dir), "--top", "5", "--endpoint", "process_advanced"])
+        text = out.getvalue()
+        assert rc == 0, rc
+        assert "=== 3 dumps" in text and "Hottest functions" in text and "process_advanced" in text, text
+
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            rc = profile_report.main(["--dir", str(Path(tmp) / "missing")])
+        assert rc == 0 and "No profiling dumps" in out.getvalue(), out.getvalue()
+
+
+def main_() -> int:
+    tests = [(name, fn) for name, fn in globals().items() if name.startswith("test_") and callable(fn)]
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"ok    {name}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL  {name}: {e}")
+    print(f"\nFailures: {failed}")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_())